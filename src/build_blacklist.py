@@ -1,10 +1,14 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from itertools import chain
 import json
 import os
 
 INPUT_FILE = "blacklist.txt"
 BLACKLIST_DATA = "blacklist/blacklist.json"
 
+# Compact output, serialized to a single string before writing
+JSON_SEPARATORS = (",", ":")
+
 CATEGORY_SORTING = {
     "Scam": 100,
     "RMT": 200,
@@ -12,29 +16,57 @@ CATEGORY_SORTING = {
     "Other": 400,
     "Unknown": 500,
 }
+# Categories interned as small ints in sort order; anything unrecognised
+# sorts as Unknown
+CATEGORY_ORDER = sorted(CATEGORY_SORTING, key=CATEGORY_SORTING.get)
+CATEGORY_IDS = {name: i for i, name in enumerate(CATEGORY_ORDER)}
+CATEGORY_SORT = tuple(CATEGORY_SORTING[name] for name in CATEGORY_ORDER)
+UNKNOWN_CATEGORY_ID = CATEGORY_IDS["Unknown"]
+# Added to a rename's sort key so it sorts after non-renames in its category
+RENAME_SORT_OFFSET = 10
+# Every value sortkey() can return, mapped to its rank
+SORTKEY_BUCKETS = {
+    key: i for i, key in enumerate(sorted({
+        value + offset
+        for value in CATEGORY_SORTING.values()
+        for offset in (0, RENAME_SORT_OFFSET)
+    }))
+}
 
-@dataclass
+@dataclass(slots=True)
 class BlacklistEntry:
     username: str
     category: str
-
-    def to_json(self) -> dict:
-        # Format for BLACKLIST_DATA
-        return {
-            "username": self.username,
-            "category": self.category,
-        }
+    # Derived from username and category; change those through rename()
+    # and set_category() so these stay in sync: username.lower(), the first
+    # character of username.upper() (used for letter ranges) and the
+    # category's index into CATEGORY_SORT.
+    lower: str = field(init=False, repr=False, compare=False)
+    first_upper: str = field(init=False, repr=False, compare=False)
+    cat_id: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.lower = self.username.lower()
+        self.first_upper = self.username.upper()[:1]
+        self.cat_id = CATEGORY_IDS.get(self.category, UNKNOWN_CATEGORY_ID)
+
+    def rename(self, username: str) -> None:
+        self.username = username
+        self.lower = username.lower()
+        self.first_upper = username.upper()[:1]
+
+    def set_category(self, category: str) -> None:
+        self.category = category
+        self.cat_id = CATEGORY_IDS.get(category, UNKNOWN_CATEGORY_ID)
 
     def sortkey(self) -> int:
-        if self.category in CATEGORY_SORTING:
-            return CATEGORY_SORTING[self.category]
-        return 500
+        return CATEGORY_SORT[self.cat_id]
 
     def to_new_str(self) -> str:
         return f"{self.username}\t{self.category}"
 
 
-@dataclass
+@dataclass(slots=True)
 class RenameEntry(BlacklistEntry):
     old_username: str
 
@@ -43,98 +75,150 @@ class RenameEntry(BlacklistEntry):
 
     def sortkey(self) -> int:
         # Sort renames after non-renames in same category
-        return super().sortkey() + 10
+        return CATEGORY_SORT[self.cat_id] + RENAME_SORT_OFFSET
 
 
 class Blacklist:
     current_update: list[BlacklistEntry]
     previous_update: list[BlacklistEntry]
     full_blacklist: list[BlacklistEntry]
+    current_has_rename: bool
+    previous_has_rename: bool
 
     def __init__(self):
         self.current_update = []
         self.previous_update = []
-
-        with open(BLACKLIST_DATA) as f:
+        self.current_has_rename = False
+        self.previous_has_rename = False
+        # Lookup indexes keyed by lowercased username. Each holds every
+        # matching entry in order, so case-insensitive duplicates in
+        # BLACKLIST_DATA stay reachable and renames can re-key them.
+        self._index: dict[str, list[BlacklistEntry]] = {}
+        self._current_idx: dict[str, list[BlacklistEntry]] = {}
+        self._previous_idx: dict[str, list[BlacklistEntry]] = {}
+        # Sorted views for the embeds, rebuilt lazily after any change
+        self._sorted: tuple[BlacklistEntry, ...] | None = None
+        self._by_category: dict[str, tuple[BlacklistEntry, ...]] = {}
+
+        with open(BLACKLIST_DATA, encoding="utf-8") as f:
             data = json.load(f)
             self.full_blacklist = [
                 BlacklistEntry(**x) for x in data
             ]
+        for entry in self.full_blacklist:
+            self._index.setdefault(entry.lower, []).append(entry)
 
         with open(INPUT_FILE) as f:
-            target = "current"
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                if line[0] == "#":
-                    if "previous" in line.lower():
-                        target = "previous"
-                    continue
-                if " -> " in line:
-                    old, new = line.split(" -> ")
-                    entry = self.update_username(old, new)
-                    new_entry = RenameEntry(
-                        username=entry.username,
-                        category=entry.category,
-                        old_username=old,
-                    )
-                    self.add_to_updates(
-                        entry=new_entry,
-                        target=target,
-                    )
-                    continue
-                username, category = line.rsplit(" ", 1)
-                if username and category:
-                    new_entry = self.get_or_append(
-                        username=username,
-                        category=category,
-                    )
-                    self.add_to_updates(
-                        entry=new_entry,
-                        target=target,
-                    )
-                    continue
-
+            lines = f.read().splitlines()
+
+        # Bind bound methods to locals to skip attribute lookups per line
+        update_username = self.update_username
+        get_or_append = self.get_or_append
+        add_to_updates = self.add_to_updates
+
+        target = "current"
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("#"):
+                # Section headers only ever switch from current to previous,
+                # so stop scanning comments once we've switched.
+                if target != "previous" and "previous" in line.lower():
+                    target = "previous"
+                continue
+            old, sep, new = line.partition(" -> ")
+            if sep:
+                if not old or not new or " -> " in new:
+                    print(f"Unable to process non-blank line in input:\n{line}")
+                    raise RuntimeError("Unable to process input line.")
+                entry = update_username(old, new)
+                new_entry = RenameEntry(
+                    username=entry.username,
+                    category=entry.category,
+                    old_username=old,
+                )
+                add_to_updates(
+                    entry=new_entry,
+                    target=target,
+                )
+                continue
+            # The line is stripped, so category is never empty; a line
+            # without a space leaves username empty instead.
+            username, _, category = line.rpartition(" ")
+            if not username:
                 print(f"Unable to process non-blank line in input:\n{line}")
                 raise RuntimeError("Unable to process input line.")
 
+            new_entry = get_or_append(
+                username=username,
+                category=category,
+            )
+            add_to_updates(
+                entry=new_entry,
+                target=target,
+            )
+
         self.save_blacklist()
 
     def save_blacklist(self):
-        with open(BLACKLIST_DATA, "w") as f:
-            data = [x.to_json() for x in self.full_blacklist]
-            json.dump(data, f)
+        with open(BLACKLIST_DATA, "w", encoding="utf-8") as f:
+            f.writelines(self.iter_blacklist_json())
+
+    def iter_blacklist_json(self):
+        # Stream BLACKLIST_DATA one entry at a time rather than building the
+        # whole list of dicts first. Only the persisted fields are written,
+        # not the caches.
+        encode = json.JSONEncoder(separators=JSON_SEPARATORS, ensure_ascii=False).encode
+        yield "["
+        for i, x in enumerate(self.full_blacklist):
+            if i:
+                yield ","
+            yield encode({"username": x.username, "category": x.category})
+        yield "]"
 
     def get_or_append(self, username: str, category: str) -> BlacklistEntry:
-        entry = self.get_entry(username)
-        if entry:
-            entry.category = category
+        key = username.lower()
+        self._sorted = None
+        if entry := self.get_entry(username):
+            entry.set_category(category)
             return entry
         entry = BlacklistEntry(
             username=username,
             category=category
         )
+        self._index[key] = [entry]
         self.full_blacklist.append(entry)
         return entry
 
+    def get_sorted_entries(self, category: str | None = None) -> tuple[BlacklistEntry, ...]:
+        # Entries sorted by lowercased username, optionally limited to one
+        # category. These are cached views, hence tuples so callers can't
+        # modify them.
+        if self._sorted is None:
+            self._sorted = tuple(sorted(self.full_blacklist, key=lambda x:x.lower))
+            by_category = {}
+            for entry in self._sorted:
+                by_category.setdefault(entry.category, []).append(entry)
+            self._by_category = {k: tuple(v) for k, v in by_category.items()}
+        if category:
+            return self._by_category.get(category, ())
+        return self._sorted
+
 
     def get_entry(self, username: str) -> BlacklistEntry | None:
-        for entry in self.full_blacklist:
-            if entry.username.lower() == username.lower():
-                return entry
+        if entries := self._index.get(username.lower()):
+            return entries[0]
         return None
 
     def get_entry_from_current(self, username: str) -> BlacklistEntry | None:
-        for entry in self.current_update:
-            if entry.username.lower() == username.lower():
-                return entry
+        if entries := self._current_idx.get(username.lower()):
+            return entries[0]
         return None
 
     def get_entry_from_previous(self, username: str) -> BlacklistEntry | None:
-        for entry in self.previous_update:
-            if entry.username.lower() == username.lower():
-                return entry
+        if entries := self._previous_idx.get(username.lower()):
+            return entries[0]
         return None
 
     def update_username(self, old: str, new: str) -> BlacklistEntry:
@@ -144,7 +228,13 @@ class Blacklist:
 
         # Otherwise, get the old entry and update it, if we can
         if entry := self.get_entry(old):
-            entry.username = new
+            old_key = entry.lower
+            entry.rename(new)
+            self._sorted = None
+            # Move the entry to its new key in every index, including any
+            # update it is already in
+            for idx in (self._index, self._current_idx, self._previous_idx):
+                self._rekey(idx, entry, old_key)
             return entry
 
         # Finally, this wasn't an update, throw an error
@@ -152,18 +242,36 @@ class Blacklist:
               f"in the blacklist. Please submit this as a new entry instead.")
         raise RuntimeError("Unable to process username change.")
 
+    @staticmethod
+    def _rekey(idx: dict[str, list[BlacklistEntry]], entry: BlacklistEntry, old_key: str):
+        entries = idx.get(old_key)
+        if not entries or not any(x is entry for x in entries):
+            return
+        remaining = [x for x in entries if x is not entry]
+        if remaining:
+            idx[old_key] = remaining
+        else:
+            del idx[old_key]
+        idx.setdefault(entry.lower, []).append(entry)
+
     def add_to_updates(self, entry: BlacklistEntry, target: str):
+        is_rename = isinstance(entry, RenameEntry)
         if "previous" in target:
             self.previous_update.append(entry)
+            self._previous_idx.setdefault(entry.lower, []).append(entry)
+            self.previous_has_rename = self.previous_has_rename or is_rename
         else:
             self.current_update.append(entry)
+            self._current_idx.setdefault(entry.lower, []).append(entry)
+            self.current_has_rename = self.current_has_rename or is_rename
 
     def format_username(self, username: str) -> str:
         # This function just surrounds the username with formatting characters
         # based on whether it is in the current or previous update.
-        if self.get_entry_from_current(username):
+        key = username.lower()
+        if key in self._current_idx:
             return f"\n**{username}**\n"
-        if self.get_entry_from_previous(username):
+        if key in self._previous_idx:
             return f"\n*{username}*\n"
         return username
 
@@ -172,10 +280,17 @@ class Blacklist:
 class Embed:
     blacklist: Blacklist
     directory = "blacklist/embeds"
+    path = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # directory and filename are class constants, so join them once per class
+        if filename := getattr(cls, "filename", None):
+            cls.path = os.path.join(cls.directory, filename)
 
     def save_embed(self) -> None:
-        with open(os.path.join(self.directory, self.filename), "w") as f:
-            json.dump(self.build_embed(), f)
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.build_embed(), separators=JSON_SEPARATORS, ensure_ascii=False))
 
 
 class NewEmbed(Embed):
@@ -183,12 +298,12 @@ class NewEmbed(Embed):
     order = 1
 
     def get_current_mode(self) -> str:
-        if any(isinstance(x, RenameEntry) for x in self.blacklist.current_update):
+        if self.blacklist.current_has_rename:
             return "ini"
         return "fix"
 
     def get_previous_mode(self) -> str:
-        if any(isinstance(x, RenameEntry) for x in self.blacklist.previous_update):
+        if self.blacklist.previous_has_rename:
             return "ini"
         return "fix"
 
@@ -199,10 +314,15 @@ class NewEmbed(Embed):
         return self.get_names(use_list=self.blacklist.previous_update)
 
     def get_names(self, use_list: list[BlacklistEntry]) -> str:
-        res = ""
-        for entry in sorted(use_list, key=lambda x:x.sortkey()):
-            res += entry.to_new_str() + "\n"
-        return res
+        # Bucket sort on sortkey(): its values are a small fixed set, so one
+        # pass keeps the same order as sorted() without comparing entries.
+        buckets = [[] for _ in SORTKEY_BUCKETS]
+        for entry in use_list:
+            buckets[SORTKEY_BUCKETS[entry.sortkey()]].append(entry)
+        return "".join([
+            f"{entry.to_new_str()}\n"
+            for entry in chain.from_iterable(buckets)
+        ])
 
     def build_embed(self) -> dict:
         res = {}
@@ -214,13 +334,11 @@ class NewEmbed(Embed):
             "Check out <#1065084098613346398> for easier updating of your in-game blocklist!"
         )
         res['description'] = (
-            "**__New Entry__**\n```" +
-            self.get_current_mode() + "\n" +
-            self.get_current_names() +
-            f"```\n\n**__Older Entry__**\n```" +
-            self.get_previous_mode() + "\n" +
-            self.get_previous_names() +
-            "```"
+            f"**__New Entry__**\n```{self.get_current_mode()}\n"
+            f"{self.get_current_names()}"
+            f"```\n\n**__Older Entry__**\n```{self.get_previous_mode()}\n"
+            f"{self.get_previous_names()}"
+            f"```"
         )
         res['color'] = 16541188
         return res
@@ -252,12 +370,10 @@ class NormalEmbed(Embed):
         ])
         return res
 
-    def get_entries(self) -> list[BlacklistEntry]:
-        entries = sorted(self.blacklist.full_blacklist, key=lambda x:x.username.lower())
-        if self.category:
-            entries = [x for x in entries if x.category == self.category]
+    def get_entries(self) -> tuple[BlacklistEntry, ...]:
+        entries = self.blacklist.get_sorted_entries(self.category)
         if self.letter_range:
-            entries = [x for x in entries if x.username.upper()[0] in self.letter_range]
+            entries = tuple(x for x in entries if x.first_upper in self.letter_range)
         return entries
 
     def get_color(self) -> int:
@@ -265,7 +381,7 @@ class NormalEmbed(Embed):
 
 
 def range_char(start, stop):
-    return list(chr(n) for n in range(ord(start), ord(stop) + 1))
+    return frozenset(chr(n) for n in range(ord(start), ord(stop) + 1))
 
 
 class ScamEmbed(NormalEmbed):
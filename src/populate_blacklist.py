@@ -7,22 +7,24 @@ if __name__ == "__main__":
     blacklist = Blacklist()
 
     with open(IMPORT) as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-
-            username, category = line.rsplit("\t", 1)
-            if username and category:
-                new_entry = blacklist.get_or_append(
-                    username=username,
-                    category=category,
-                )
-                continue
+        lines = f.read().splitlines()
 
+    get_or_append = blacklist.get_or_append
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        username, _, category = line.rpartition("\t")
+        if not username:
             print(f"Unable to process non-blank line in input:\n{line}")
             raise RuntimeError("Unable to process input line.")
 
+        new_entry = get_or_append(
+            username=username,
+            category=category,
+        )
+
     blacklist.save_blacklist()
 
 